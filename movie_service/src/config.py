@@ -1,3 +1,5 @@
+from functools import cache
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -10,14 +12,32 @@ class Settings(BaseSettings):
         TMDB_BASE_URL (str): Базовый URL TMDB API. По умолчанию "https://api.themoviedb.org/3".
         REDIS_HOST (str): Хост Redis-сервера.
         REDIS_PORT (int): Порт Redis-сервера.
+        REDIS_POOL_SIZE (int): Максимальное число соединений в пуле Redis.
+        SLIDING_TTL (bool): Продлевать TTL результатов поиска при каждом попадании в кэш.
     """
     TMDB_API_KEY: str
     TMDB_BASE_URL: str = "https://api.themoviedb.org/3"
 
     REDIS_HOST: str
     REDIS_PORT: int
+    REDIS_POOL_SIZE: int = 64
+    SLIDING_TTL: bool = False
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
 
-settings = Settings()
\ No newline at end of file
+@cache
+def get_settings() -> Settings:
+    """
+    Возвращает единственный экземпляр настроек приложения.
+
+    .env файл читается и валидируется только при первом вызове,
+    последующие вызовы возвращают уже созданный объект.
+
+    Returns:
+        Settings: Настройки приложения.
+    """
+    return Settings()
+
+
+settings = get_settings()
@@ -1,7 +1,8 @@
 from contextlib import asynccontextmanager
 import httpx
-from fastapi import FastAPI, Depends, HTTPException
-from redis.asyncio import Redis
+from fastapi import FastAPI, Depends, HTTPException, Query, Response
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.asyncio.connection import HIREDIS_AVAILABLE
 
 from .config import settings
 from .service import MovieService
@@ -33,19 +34,40 @@ async def lifespan(app: FastAPI):
     Yields:
         None: Передает управление обратно в приложение.
     """
-    # Инициализация подключений при запуске приложения
-    resources["redis"] = Redis(
+    # Инициализация подключений при запуске приложения.
+    # Явный пул с увеличенным лимитом соединений, чтобы конкурентные запросы
+    # к кэшу не выстраивались в очередь за одним соединением.
+    # BlockingConnectionPool при исчерпании лимита ждет освободившееся соединение
+    # (до timeout секунд), а не падает с MaxConnectionsError, как обычный ConnectionPool.
+    # decode_responses не включаем: кэш хранит сырые байты orjson
+    redis_pool = BlockingConnectionPool(
         host=settings.REDIS_HOST,
         port=settings.REDIS_PORT,
-        decode_responses=True
+        max_connections=settings.REDIS_POOL_SIZE,
+        timeout=5.0
+    )
+    resources["redis"] = Redis(connection_pool=redis_pool)
+    # redis-py автоматически выбирает C-парсер hiredis, если он установлен
+    logger.info(f"Redis parser: {'hiredis' if HIREDIS_AVAILABLE else 'pure-python'}")
+    # HTTP/2 мультиплексирует параллельные запросы к TMDB поверх нескольких
+    # TLS-соединений, а увеличенный keepalive-пул избавляет от лишних рукопожатий
+    resources["http_client"] = httpx.AsyncClient(
+        base_url=settings.TMDB_BASE_URL,
+        http2=True,
+        limits=httpx.Limits(
+            max_keepalive_connections=64,
+            max_connections=128,
+            keepalive_expiry=30.0
+        ),
+        timeout=httpx.Timeout(5.0, connect=2.0)
     )
-    resources["http_client"] = httpx.AsyncClient(base_url=settings.TMDB_BASE_URL)
 
     yield
 
     # Корректное закрытие подключений при завершении работы
     await resources["http_client"].aclose()
     await resources["redis"].aclose()
+    await redis_pool.disconnect()
 
 
 app = FastAPI(title="Movie Service", lifespan=lifespan)
@@ -75,18 +97,46 @@ async def search_handler(query: str, service: MovieService = Depends(get_service
     """
     Обрабатывает запрос на поиск фильмов.
 
+    Сервис возвращает уже сериализованное и провалидированное тело ответа,
+    поэтому оно отдается напрямую через Response, без повторной
+    валидации через response_model (схема остается для документации OpenAPI).
+
     Args:
         query (str): Поисковый запрос (название фильма).
         service (MovieService): Сервис для работы с фильмами, внедряется через зависимость.
 
     Returns:
-        MovieSearchResponse: Результаты поиска фильмов.
+        Response: JSON-ответ в формате MovieSearchResponse.
 
     Raises:
         HTTPException: Если возникает ошибка при обращении к внешнему API.
     """
-    results = await service.search_movies(query)
-    return {"results": results}
+    body = await service.search_movies(query)
+    return Response(content=body, media_type="application/json")
+
+
+@app.get("/movies", response_model=list[MovieDetail])
+async def get_movies_bulk(
+    ids: list[int] = Query(..., min_length=1, max_length=50),
+    service: MovieService = Depends(get_service)
+):
+    """
+    Получает детальную информацию сразу о нескольких фильмах (?ids=1&ids=2).
+
+    Используется для межсервисного взаимодействия: User Service получает
+    данные о нескольких фильмах одним запросом вместо N отдельных.
+
+    Args:
+        ids (list[int]): Идентификаторы фильмов в TMDB (от 1 до 50).
+        service (MovieService): Сервис для работы с фильмами, внедряется через зависимость.
+
+    Returns:
+        list[MovieDetail]: Найденные фильмы. Несуществующие ID пропускаются.
+
+    Raises:
+        HTTPException: 502 если TMDB недоступен.
+    """
+    return await service.get_movies_by_ids(ids)
 
 
 @app.get("/movies/{movie_id}", response_model=MovieDetail)
@@ -1,3 +1,4 @@
+import msgspec
 from pydantic import BaseModel, Field
 
 class MovieShort(BaseModel):
@@ -44,4 +45,40 @@ class MovieSearchResponse(BaseModel):
     Attributes:
         results (list[MovieShort]): Список найденных фильмов.
     """
-    results: list[MovieShort]
\ No newline at end of file
+    results: list[MovieShort]
+
+
+class MovieShortStruct(msgspec.Struct, kw_only=True):
+    """
+    Краткое представление фильма для горячего пути поиска (msgspec).
+
+    Повторяет поля MovieShort, но валидация и JSON-кодирование выполняются
+    в C-реализации msgspec. Неизвестные поля ответа TMDB пропускаются
+    при декодировании без создания промежуточных объектов.
+
+    Attributes:
+        id (int): Уникальный идентификатор фильма в TMDB.
+        title (str): Название фильма.
+        release_date (str | None): Дата выхода фильма. Может быть None.
+        overview (str): Краткое описание сюжета. По умолчанию пустая строка.
+        vote_average (float): Средняя оценка фильма.
+    """
+    id: int
+    title: str
+    release_date: str | None = None
+    overview: str = ""
+    vote_average: float
+
+
+class MovieSearchStruct(msgspec.Struct):
+    """
+    Результаты поиска фильмов для горячего пути (msgspec).
+
+    Используется и для декодирования ответа TMDB /search/movie, и для
+    кодирования ответа сервиса. Схема ответа в OpenAPI описывается
+    моделью MovieSearchResponse.
+
+    Attributes:
+        results (list[MovieShortStruct]): Список найденных фильмов.
+    """
+    results: list[MovieShortStruct] = []
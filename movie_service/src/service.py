@@ -1,15 +1,151 @@
-import json
+import asyncio
 import logging
+import random
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
 import httpx
+import msgpack
+import msgspec
+import orjson
 from fastapi import HTTPException
 from redis.asyncio import Redis
 
 from .config import settings
+from .schemas import MovieSearchStruct
 
 import structlog
 
 logger = structlog.get_logger()
 
+# Запросы к TMDB, выполняющиеся в данный момент, по ключу кэша.
+# MovieService создается на каждый запрос, поэтому словарь общий для модуля
+_inflight: dict[str, asyncio.Task] = {}
+
+# Результаты поиска считаются свежими 5 минут. Устаревшие (до 10 минут)
+# отдаются клиенту сразу, а обновляются в фоне (stale-while-revalidate)
+SEARCH_CACHE_TTL = 300
+SEARCH_CACHE_STALE_TTL = 600
+
+
+def _jitter(ttl: int) -> int:
+    """
+    Добавляет к TTL случайный разброс ±10%, чтобы популярные ключи
+    не истекали одновременно (защита от cache stampede).
+
+    Args:
+        ttl (int): Базовый TTL в секундах.
+
+    Returns:
+        int: TTL со случайным разбросом.
+    """
+    spread = ttl // 10
+    return ttl + random.randint(-spread, spread)
+
+
+def _log_refresh_error(task: asyncio.Task) -> None:
+    """
+    Логирует ошибку фонового обновления кэша, которое никто не ожидает.
+
+    Args:
+        task (asyncio.Task): Завершившаяся задача обновления.
+    """
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Background cache refresh failed: {task.exception()}")
+
+# L1-кэш в памяти процесса перед Redis для самых горячих запросов:
+# ключ кэша -> (время истечения по monotonic, готовое тело ответа).
+# Работает в одном потоке цикла событий, поэтому блокировки не нужны
+_L1: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+_L1_MAX = 512
+_L1_TTL = 60
+
+
+def _l1_get(cache_key: str) -> bytes | None:
+    """
+    Возвращает тело ответа из L1-кэша, если запись есть и не устарела.
+
+    Args:
+        cache_key (str): Ключ кэша.
+
+    Returns:
+        bytes | None: Тело ответа или None при промахе.
+    """
+    entry = _L1.get(cache_key)
+    if entry is None:
+        return None
+    expires_at, body = entry
+    if expires_at < time.monotonic():
+        del _L1[cache_key]
+        return None
+    _L1.move_to_end(cache_key)
+    return body
+
+
+def _l1_set(cache_key: str, body: bytes) -> None:
+    """
+    Сохраняет тело ответа в L1-кэш, вытесняя самые старые записи при переполнении.
+
+    Args:
+        cache_key (str): Ключ кэша.
+        body (bytes): Тело ответа.
+    """
+    _L1[cache_key] = (time.monotonic() + _L1_TTL, body)
+    _L1.move_to_end(cache_key)
+    while len(_L1) > _L1_MAX:
+        _L1.popitem(last=False)
+
+
+def _movie_cache_key(movie_id: int) -> str:
+    """
+    Формирует ключ кэша для деталей фильма.
+
+    Args:
+        movie_id (int): Уникальный идентификатор фильма в TMDB.
+
+    Returns:
+        str: Ключ кэша Redis.
+    """
+    # Детали фильма хранятся в кэше в формате msgpack (v2 - смена формата с JSON)
+    return f"movie_detail:v2:{movie_id}"
+
+
+# Постоянная часть параметров запросов к TMDB и URL поиска собираются один раз,
+# на каждый запрос к ним добавляется только поисковая строка
+_BASE_PARAMS = httpx.QueryParams({"api_key": settings.TMDB_API_KEY, "language": "ru-RU"})
+_SEARCH_URL = httpx.URL("/search/movie")
+
+# Декодер ответа TMDB сразу в типизированные структуры (с валидацией)
+# и кодировщик итогового тела ответа
+_SEARCH_DECODER = msgspec.json.Decoder(MovieSearchStruct)
+_SEARCH_ENCODER = msgspec.json.Encoder()
+
+# Таблица перевода A-Z -> a-z для быстрой нормализации ASCII-запросов
+_LOWER = bytes.maketrans(bytes(range(65, 91)), bytes(range(97, 123)))
+
+
+@lru_cache(maxsize=1024)
+def _search_cache_key(query: str) -> str:
+    """
+    Формирует ключ кэша для поискового запроса.
+
+    Нормализация: приведение к нижнему регистру и удаление пробелов по краям.
+    Для ASCII-запросов используется bytes.translate, для остальных - str.lower().
+
+    Args:
+        query (str): Поисковый запрос (название фильма).
+
+    Returns:
+        str: Ключ кэша Redis.
+    """
+    try:
+        normalized = query.encode("ascii").translate(_LOWER).strip().decode("ascii")
+    except UnicodeEncodeError:
+        normalized = query.lower().strip()
+    # v2: значение хранится в виде хэша с полями body и fetched_at
+    return f"movie_search:v2:{normalized}"
+
 
 class MovieService:
     """
@@ -30,44 +166,106 @@ class MovieService:
         self.redis = redis
         self.client = http_client
 
-    async def search_movies(self, query: str) -> list[dict]:
+    async def search_movies(self, query: str) -> bytes:
         """
         Выполняет поиск фильмов по запросу с использованием кэширования.
 
         Алгоритм работы:
         1. Нормализация поискового запроса и формирование ключа кэша
-        2. Проверка наличия результатов в кэше Redis
-        3. Если кэш отсутствует - запрос к TMDB API
-        4. Сохранение результатов в кэш с TTL 5 минут
+        2. Проверка L1-кэша в памяти процесса, затем кэша Redis (с продлением TTL,
+           если включен SLIDING_TTL)
+        3. Если запись в Redis старше 5 минут - она отдается клиенту сразу,
+           а обновление запускается в фоне
+        4. Если кэш отсутствует - запрос к TMDB API (один на все конкурентные
+           запросы с тем же ключом)
+        5. Валидация результатов и сохранение готового JSON-ответа в кэш
+
+        В кэше хранится уже сериализованное тело ответа ``{"results": [...]}``,
+        поэтому при попадании в кэш байты отдаются клиенту без повторного
+        парсинга и валидации.
 
         Args:
             query (str): Поисковый запрос (название фильма).
 
         Returns:
-            list[dict]: Список словарей с информацией о фильмах.
+            bytes: JSON-тело ответа в формате MovieSearchResponse.
 
         Raises:
             HTTPException: Если не удалось выполнить запрос к TMDB API.
         """
         # Нормализация ключа: приведение к нижнему регистру и удаление пробелов
-        cache_key = f"movie_search:{query.lower().strip()}"
+        cache_key = _search_cache_key(query)
+
+        # Сначала проверяем L1-кэш в памяти процесса (без сетевого запроса)
+        body = _l1_get(cache_key)
+        if body is not None:
+            return body
 
         # Попытка получить данные из кэша Redis
-        cached = await self.redis.get(cache_key)
-        if cached:
-            logger.info(f"🟢 Cache HIT for '{query}'")
-            return json.loads(cached)
+        if settings.SLIDING_TTL:
+            # Скользящий TTL: HMGET и EXPIRE отправляются одним пакетом за один round trip
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hmget(cache_key, "body", "fetched_at")
+            pipe.expire(cache_key, _jitter(SEARCH_CACHE_STALE_TTL))
+            (body, fetched_at), _ = await pipe.execute()
+        else:
+            body, fetched_at = await self.redis.hmget(cache_key, "body", "fetched_at")
+        if body:
+            if time.time() - float(fetched_at) > SEARCH_CACHE_TTL:
+                # Отдаем устаревшие данные сразу, обновляем их в фоне
+                logger.info(f"🟠 Cache STALE for '{query}' -> Refreshing in background")
+                if cache_key not in _inflight:
+                    self._shared_fetch(cache_key, query).add_done_callback(_log_refresh_error)
+            else:
+                logger.info(f"🟢 Cache HIT for '{query}'")
+                _l1_set(cache_key, body)
+            return body
 
         # Если кэш отсутствует, выполняем запрос к внешнему API
         logger.info(f"🟡 Cache MISS for '{query}' -> Calling TMDB")
+
+        # shield: отмена одного клиента не должна отменять общий запрос к TMDB
+        return await asyncio.shield(self._shared_fetch(cache_key, query))
+
+    def _shared_fetch(self, cache_key: str, query: str) -> asyncio.Task:
+        """
+        Возвращает общую задачу запроса к TMDB для данного ключа кэша.
+
+        Конкурентные запросы с тем же ключом (в том числе фоновое обновление)
+        получают одну и ту же задачу, вместо того чтобы каждый раз обращаться к TMDB.
+
+        Args:
+            cache_key (str): Ключ кэша Redis для данного запроса.
+            query (str): Поисковый запрос (название фильма).
+
+        Returns:
+            asyncio.Task: Задача, возвращающая JSON-тело ответа.
+        """
+        task = _inflight.get(cache_key)
+        if task is None:
+            task = asyncio.create_task(self._fetch_search(cache_key, query))
+            _inflight[cache_key] = task
+            task.add_done_callback(lambda _: _inflight.pop(cache_key, None))
+        return task
+
+    async def _fetch_search(self, cache_key: str, query: str) -> bytes:
+        """
+        Запрашивает результаты поиска в TMDB и сохраняет готовый ответ в кэш.
+
+        Args:
+            cache_key (str): Ключ кэша Redis для данного запроса.
+            query (str): Поисковый запрос (название фильма).
+
+        Returns:
+            bytes: JSON-тело ответа в формате MovieSearchResponse.
+
+        Raises:
+            HTTPException: Если не удалось выполнить запрос к TMDB API.
+        """
         try:
             response = await self.client.get(
-                "/search/movie",
-                params={
-                    "query": query,
-                    "api_key": settings.TMDB_API_KEY,
-                    "language": "ru-RU"
-                }
+                _SEARCH_URL,
+                params=_BASE_PARAMS.merge({"query": query})
             )
             response.raise_for_status()
         except httpx.HTTPError as e:
@@ -75,14 +273,22 @@ class MovieService:
             logger.error(f"TMDB Error: {e}")
             raise HTTPException(status_code=502, detail="Movie provider unavailable")
 
-        data = response.json().get("results", [])
+        # Декодируем и валидируем ответ TMDB одним вызовом msgspec: из документа
+        # извлекаются только поля MovieShortStruct, остальные пропускаются
+        payload = _SEARCH_DECODER.decode(response.content)
+        body = _SEARCH_ENCODER.encode(payload)
 
-        # Сохраняем результаты в кэш, только если они не пустые
-        # TTL 300 секунд (5 минут) для актуальности данных
-        if data:
-            await self.redis.set(cache_key, json.dumps(data), ex=300)
+        # Сохраняем результаты в кэш, только если они не пустые.
+        # Вместе с телом хранится время получения, по которому определяется
+        # устаревание; жесткий TTL со случайным разбросом разносит истечение ключей
+        if payload.results:
+            pipe = self.redis.pipeline()
+            pipe.hset(cache_key, mapping={"body": body, "fetched_at": time.time()})
+            pipe.expire(cache_key, _jitter(SEARCH_CACHE_STALE_TTL))
+            await pipe.execute()
+            _l1_set(cache_key, body)
 
-        return data
+        return body
 
     async def get_movie_by_id(self, movie_id: int) -> dict | None:
         """
@@ -103,24 +309,66 @@ class MovieService:
         Raises:
             HTTPException: Если не удалось выполнить запрос к TMDB API.
         """
-        cache_key = f"movie_detail:{movie_id}"
+        cache_key = _movie_cache_key(movie_id)
 
         # Попытка получить данные из кэша Redis
         cached = await self.redis.get(cache_key)
         if cached:
             logger.info(f"🟢 Cache HIT for movie ID {movie_id}")
-            return json.loads(cached)
+            return msgpack.unpackb(cached, raw=False)
 
-        # Если кэш отсутствует, выполняем запрос к внешнему API
+        return await self._fetch_movie(movie_id)
+
+    async def get_movies_by_ids(self, movie_ids: list[int]) -> list[dict]:
+        """
+        Получает детальную информацию сразу о нескольких фильмах.
+
+        Алгоритм работы:
+        1. Все ключи кэша читаются из Redis одной командой MGET
+        2. Фильмы, отсутствующие в кэше, параллельно запрашиваются в TMDB
+        3. Ненайденные фильмы в результат не попадают
+
+        Args:
+            movie_ids (list[int]): Идентификаторы фильмов в TMDB (дубликаты игнорируются).
+
+        Returns:
+            list[dict]: Найденные фильмы в порядке запрошенных идентификаторов.
+
+        Raises:
+            HTTPException: Если не удалось выполнить запрос к TMDB API.
+        """
+        unique_ids = list(dict.fromkeys(movie_ids))
+        cached = await self.redis.mget([_movie_cache_key(movie_id) for movie_id in unique_ids])
+
+        movies = {
+            movie_id: msgpack.unpackb(raw, raw=False)
+            for movie_id, raw in zip(unique_ids, cached)
+            if raw
+        }
+        logger.info(f"Bulk movie lookup: {len(movies)} cached, {len(unique_ids) - len(movies)} from TMDB")
+
+        missing = [movie_id for movie_id in unique_ids if movie_id not in movies]
+        fetched = await asyncio.gather(*(self._fetch_movie(movie_id) for movie_id in missing))
+        movies.update(zip(missing, fetched))
+
+        return [movies[movie_id] for movie_id in unique_ids if movies[movie_id] is not None]
+
+    async def _fetch_movie(self, movie_id: int) -> dict | None:
+        """
+        Запрашивает детали фильма в TMDB и сохраняет их в кэш.
+
+        Args:
+            movie_id (int): Уникальный идентификатор фильма в TMDB.
+
+        Returns:
+            dict | None: Словарь с информацией о фильме или None, если фильм не найден.
+
+        Raises:
+            HTTPException: Если не удалось выполнить запрос к TMDB API.
+        """
         logger.info(f"🟡 Cache MISS for movie ID {movie_id} -> Calling TMDB")
         try:
-            response = await self.client.get(
-                f"/movie/{movie_id}",
-                params={
-                    "api_key": settings.TMDB_API_KEY,
-                    "language": "ru-RU"
-                }
-            )
+            response = await self.client.get(f"/movie/{movie_id}", params=_BASE_PARAMS)
             # Если фильм не найден, возвращаем None
             if response.status_code == 404:
                 logger.warning(f"Movie ID {movie_id} not found in TMDB")
@@ -131,10 +379,10 @@ class MovieService:
             logger.error(f"TMDB Error: {e}")
             raise HTTPException(status_code=502, detail="Movie provider unavailable")
 
-        data = response.json()
+        data = orjson.loads(response.content)
 
-        # Сохраняем результаты в кэш с более длительным TTL (3600 сек = 1 час)
+        # Сохраняем результаты в кэш с более длительным TTL (около 1 часа)
         # так как детали конкретного фильма меняются редко
-        await self.redis.set(cache_key, json.dumps(data), ex=3600)
+        await self.redis.set(_movie_cache_key(movie_id), msgpack.packb(data), ex=_jitter(3600))
 
-        return data
\ No newline at end of file
+        return data
@@ -1,6 +1,7 @@
 import logging
 import os
 import sys
+import grpc
 import structlog
 from opentelemetry import trace
 from opentelemetry.sdk.trace import TracerProvider
@@ -8,10 +9,16 @@ from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
 from opentelemetry.sdk.resources import Resource
 
+# Провайдер трейсинга создается один раз на процесс: повторные вызовы
+# setup_observability не должны плодить экспортеры и фоновые потоки
+_provider: TracerProvider | None = None
+
 def setup_observability(service_name: str):
     """
     Настраивает структурное логирование и распределенный трейсинг.
     """
+    global _provider
+
     # --- 1. Настройка structlog ---
     structlog.configure(
         processors=[
@@ -34,14 +41,28 @@ def setup_observability(service_name: str):
     )
 
     # --- 2. Настройка OpenTelemetry ---
-    resource = Resource.create({"service.name": service_name})
-    provider = TracerProvider(resource=resource)
-    
-    otlp_endpoint = os.getenv("OTLP_GRPC_ENDPOINT", "http://jaeger:4317")
-    
-    exporter = OTLPSpanExporter(endpoint=otlp_endpoint, insecure=True)
-    processor = BatchSpanProcessor(exporter)
-    provider.add_span_processor(processor)
-    trace.set_tracer_provider(provider)
+    if _provider is None:
+        resource = Resource.create({"service.name": service_name})
+        provider = TracerProvider(resource=resource)
+
+        otlp_endpoint = os.getenv("OTLP_GRPC_ENDPOINT", "http://jaeger:4317")
+
+        # Gzip уменьшает объем gRPC-трафика до коллектора
+        exporter = OTLPSpanExporter(
+            endpoint=otlp_endpoint,
+            insecure=True,
+            compression=grpc.Compression.Gzip,
+        )
+        # Увеличенная очередь не теряет спаны при всплесках нагрузки,
+        # а крупные пачки снижают накладные расходы на экспорт
+        processor = BatchSpanProcessor(
+            exporter,
+            max_queue_size=4096,
+            schedule_delay_millis=2000,
+            max_export_batch_size=512,
+        )
+        provider.add_span_processor(processor)
+        trace.set_tracer_provider(provider)
+        _provider = provider
 
     return structlog.get_logger()
@@ -0,0 +1,52 @@
+"""add id to favorites (user_id, added_at desc) index
+
+Revision ID: 0cb031f62d0d
+Revises: 59ebdb5a3097
+Create Date: 2026-10-14 16:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0cb031f62d0d'
+down_revision: Union[str, Sequence[str], None] = '59ebdb5a3097'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _rebuild_index(columns: list) -> None:
+    """
+    Пересоздает ix_favorites_user_added с новым набором колонок.
+
+    Новый индекс строится CONCURRENTLY под временным именем, и только потом
+    старый удаляется, поэтому чтение избранного ни на момент не остается без индекса.
+    """
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_favorites_user_added_new',
+            'favorites',
+            columns,
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_favorites_user_added',
+            table_name='favorites',
+            postgresql_concurrently=True,
+        )
+    op.execute('ALTER INDEX ix_favorites_user_added_new RENAME TO ix_favorites_user_added')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # id в индексе соответствует курсору пагинации (added_at, id)
+    _rebuild_index(['user_id', sa.text('added_at DESC'), sa.text('id DESC')])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _rebuild_index(['user_id', sa.text('added_at DESC')])
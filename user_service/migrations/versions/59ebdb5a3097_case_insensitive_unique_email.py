@@ -0,0 +1,54 @@
+"""case-insensitive unique email
+
+Revision ID: 59ebdb5a3097
+Revises: 8339cf1fcd7b
+Create Date: 2026-10-14 11:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '59ebdb5a3097'
+down_revision: Union[str, Sequence[str], None] = '8339cf1fcd7b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Новый индекс строится без блокировки записи; если в таблице уже есть
+    # email, отличающиеся только регистром, создание индекса завершится ошибкой
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_users_email_lower',
+            'users',
+            [sa.text('lower(email)')],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_users_email',
+            table_name='users',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_email',
+            'users',
+            ['email'],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'uq_users_email_lower',
+            table_name='users',
+            postgresql_concurrently=True,
+        )
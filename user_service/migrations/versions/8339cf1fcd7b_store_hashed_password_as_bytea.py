@@ -0,0 +1,44 @@
+"""store hashed_password as bytea
+
+Revision ID: 8339cf1fcd7b
+Revises: 97cda5357ebd
+Create Date: 2026-10-14 11:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8339cf1fcd7b'
+down_revision: Union[str, Sequence[str], None] = '97cda5357ebd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # convert_to сохраняет байты строки как есть, в отличие от ::bytea,
+    # который интерпретирует обратные слэши как escape-последовательности
+    op.alter_column(
+        'users',
+        'hashed_password',
+        existing_type=sa.String(length=128),
+        type_=sa.LargeBinary(length=128),
+        existing_nullable=False,
+        postgresql_using="convert_to(hashed_password, 'UTF8')",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column(
+        'users',
+        'hashed_password',
+        existing_type=sa.LargeBinary(length=128),
+        type_=sa.String(length=128),
+        existing_nullable=False,
+        postgresql_using="convert_from(hashed_password, 'UTF8')",
+    )
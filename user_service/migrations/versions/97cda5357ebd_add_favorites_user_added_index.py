@@ -0,0 +1,42 @@
+"""add favorites (user_id, added_at desc) index
+
+Revision ID: 97cda5357ebd
+Revises: 8c57619df004
+Create Date: 2026-10-14 10:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '97cda5357ebd'
+down_revision: Union[str, Sequence[str], None] = '8c57619df004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY не блокирует запись в таблицу,
+    # но не может выполняться внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_favorites_user_added',
+            'favorites',
+            ['user_id', sa.text('added_at DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_favorites_user_added',
+            table_name='favorites',
+            postgresql_concurrently=True,
+        )
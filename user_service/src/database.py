@@ -3,10 +3,18 @@ from sqlalchemy.orm import DeclarativeBase
 from .config import settings
 
 # Создаем асинхронный движок для подключения к базе данных
-# Параметр echo=True включает логирование SQL-запросов (используется только для отладки)
+# Логирование SQL-запросов (echo) включается только в режиме отладки.
+# pool_pre_ping проверяет соединение перед выдачей из пула, чтобы не получать
+# ошибку на первом запросе после простоя, а pool_recycle переоткрывает
+# соединения старше 30 минут, пока их не закрыл сервер или балансировщик
 engine = create_async_engine(
     settings.DATABASE_URL,
-    echo=True,
+    echo=settings.DEBUG,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=30,
+    pool_recycle=1800,
+    pool_pre_ping=True,
 )
 
 # Фабрика для создания асинхронных сессий работы с базой данных
@@ -1,6 +1,9 @@
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+import jwt
+from cachetools import TLRUCache
+from jwt import InvalidTokenError as JWTError
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -12,6 +15,45 @@ from .schemas import TokenData
 # OAuth2 схема для извлечения токена из заголовка Authorization
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token")
 
+# Кэш проверенных токенов: повторные запросы с тем же токеном в течение
+# 5 секунд (но не дольше срока его действия) не проверяют подпись заново
+_DECODED_TOKEN_TTL = 5
+
+
+def _decoded_token_ttu(token: str, payload: dict, now: float) -> float:
+    """Время, до которого декодированный токен хранится в кэше."""
+    return min(now + _DECODED_TOKEN_TTL, payload.get("exp", now + _DECODED_TOKEN_TTL))
+
+
+_DECODED_TOKENS: TLRUCache = TLRUCache(maxsize=10_000, ttu=_decoded_token_ttu, timer=time.time)
+
+
+def decode_access_token(token: str) -> dict:
+    """
+    Проверяет подпись JWT токена и возвращает его payload.
+
+    Результат проверки кэшируется по строке токена на короткое время.
+
+    Args:
+        token (str): JWT токен.
+
+    Returns:
+        dict: Payload токена.
+
+    Raises:
+        JWTError: Если токен невалиден или истек.
+    """
+    payload = _DECODED_TOKENS.get(token)
+    if payload is None:
+        # Декодируем JWT токен (PyJWT: HMAC считается через OpenSSL в cryptography)
+        payload = jwt.decode(
+            token,
+            settings.SECRET_KEY,
+            algorithms=[settings.ALGORITHM]
+        )
+        _DECODED_TOKENS[token] = payload
+    return payload
+
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
@@ -40,12 +82,7 @@ async def get_current_user(
     )
 
     try:
-        # Декодируем JWT токен
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
-        )
+        payload = decode_access_token(token)
         email: str = payload.get("sub")
         user_id: int = payload.get("user_id")
 
@@ -1,10 +1,17 @@
-import json
 import aio_pika
+import orjson
 import structlog
 from .config import settings
 
 logger = structlog.get_logger()
 
+# Общие свойства сообщений-уведомлений: очередь не durable, поэтому
+# сохранять сообщения на диск брокера не нужно
+_MESSAGE_PROPERTIES = {
+    "content_type": "application/json",
+    "delivery_mode": aio_pika.DeliveryMode.NOT_PERSISTENT,
+}
+
 class EventPublisher:
     """
     Класс для отправки событий в брокер сообщений RabbitMQ.
@@ -20,7 +27,9 @@ class EventPublisher:
         while retries > 0:
             try:
                 self.connection = await aio_pika.connect_robust(settings.RABBITMQ_URL)
-                self.channel = await self.connection.channel()
+                # Уведомления отправляются по принципу fire-and-forget:
+                # без подтверждений публикации от брокера (лишний round trip)
+                self.channel = await self.connection.channel(publisher_confirms=False)
                 logger.info("Successfully connected to RabbitMQ")
                 return
             except Exception as e:
@@ -45,18 +54,15 @@ class EventPublisher:
             logger.error("RabbitMQ channel not initialized")
             return
 
-        message_body = {
+        message_body = orjson.dumps({
             "event": "UserCreated",
             "user_id": user_id,
             "email": email
-        }
+        })
 
         try:
             await self.channel.default_exchange.publish(
-                aio_pika.Message(
-                    body=json.dumps(message_body).encode(),
-                    content_type="application/json"
-                ),
+                aio_pika.Message(body=message_body, **_MESSAGE_PROPERTIES),
                 routing_key="user_created_queue"
             )
             logger.info(f"Published UserCreated event for user {email}")
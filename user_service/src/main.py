@@ -1,13 +1,16 @@
 from contextlib import asynccontextmanager
-from datetime import timedelta
-from fastapi import FastAPI, Depends, HTTPException, status
+from datetime import datetime, timedelta
+from fastapi import FastAPI, Depends, HTTPException, Query, Response, status
+from fastapi.responses import ORJSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import TypeAdapter
+from redis.asyncio import ConnectionPool, Redis
 import httpx
 
 from .database import get_db
 from .schemas import UserCreate, UserResponse, Token, FavoriteCreate, FavoriteResponse
-from .service import UserService
+from . import service
 from .config import settings
 from .security import create_access_token
 from .dependencies import get_current_user
@@ -18,24 +21,41 @@ from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
 from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
 from opentelemetry.instrumentation.aio_pika import AioPikaInstrumentor
+from opentelemetry.instrumentation.redis import RedisInstrumentor
 
 # Настройка логирования и трейсинга
 logger = setup_observability("user_service")
 
-# Глобальный словарь для хранения HTTP клиента
+# Глобальный словарь для хранения HTTP клиента и подключения к Redis
 resources = {}
 
+# Валидатор списка избранного строится один раз при импорте и проверяет
+# и сериализует весь список одним вызовом pydantic-core
+_FAVORITES_ADAPTER = TypeAdapter(list[FavoriteResponse])
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Контекстный менеджер для управления жизненным циклом приложения.
 
-    Создает HTTP клиент для межсервисных запросов при запуске
-    и корректно закрывает его при завершении.
+    Создает HTTP клиент для межсервисных запросов и подключение к Redis
+    при запуске и корректно закрывает их при завершении.
     """
-    # Инициализация HTTP клиента
-    resources["http_client"] = httpx.AsyncClient()
+    # Инициализация общего HTTP клиента для запросов к Movie Service.
+    # Один клиент на все приложение переиспользует keep-alive соединения,
+    # поэтому запросы не платят за установку TCP-соединения.
+    # HTTP/2 не включаем: Movie Service доступен по cleartext HTTP/1.1 (uvicorn)
+    resources["http_client"] = httpx.AsyncClient(
+        base_url=settings.MOVIE_SERVICE_URL,
+        limits=httpx.Limits(max_keepalive_connections=100, keepalive_expiry=30.0),
+        timeout=httpx.Timeout(5.0, connect=2.0),
+    )
+
+    # Redis хранит данные фильмов, общие для всех воркеров и реплик сервиса.
+    # decode_responses не включаем: в кэше лежат сырые байты orjson
+    redis_pool = ConnectionPool(host=settings.REDIS_HOST, port=settings.REDIS_PORT)
+    resources["redis"] = Redis(connection_pool=redis_pool)
 
     # Подключение к RabbitMQ
     from .events import publisher
@@ -45,13 +65,33 @@ async def lifespan(app: FastAPI):
 
     # Закрытие клиентов
     await resources["http_client"].aclose()
+    await resources["redis"].aclose()
+    await redis_pool.disconnect()
     await publisher.close()
 
 
-app = FastAPI(title="User Service", lifespan=lifespan)
+# ORJSONResponse: сериализация ответов через orjson вместо стандартного json
+app = FastAPI(title="User Service", lifespan=lifespan, default_response_class=ORJSONResponse)
 
-# Глобальный словарь для хранения HTTP клиента
-resources = {}
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Зависимость FastAPI, возвращающая общий HTTP клиент приложения.
+
+    Returns:
+        httpx.AsyncClient: Клиент, созданный при запуске приложения.
+    """
+    return resources["http_client"]
+
+
+def get_redis() -> Redis:
+    """
+    Зависимость FastAPI, возвращающая общее подключение к Redis.
+
+    Returns:
+        Redis: Клиент Redis, созданный при запуске приложения.
+    """
+    return resources["redis"]
 
 
 @app.post("/register", response_model=UserResponse)
@@ -72,8 +112,7 @@ async def register(
     Raises:
         HTTPException: Если email уже зарегистрирован (код 400).
     """
-    service = UserService(db)
-    return await service.create_user(user_in)
+    return await service.create_user(db, user_in)
 
 
 @app.post("/token", response_model=Token)
@@ -96,10 +135,8 @@ async def login_for_access_token(
     Raises:
         HTTPException: Если email или пароль неверны (код 401).
     """
-    service = UserService(db)
-
     # form_data.username - email
-    user = await service.authenticate_user(form_data.username, form_data.password)
+    user = await service.authenticate_user(db, form_data.username, form_data.password)
 
     if not user:
         raise HTTPException(
@@ -115,14 +152,17 @@ async def login_for_access_token(
         expires_delta=access_token_expires
     )
 
-    return {"access_token": access_token, "token_type": "bearer"}
+    # Ответ уже в виде словаря, поэтому отдаем его напрямую, минуя jsonable_encoder
+    return ORJSONResponse({"access_token": access_token, "token_type": "bearer"})
 
 
 @app.post("/users/me/favorites", response_model=FavoriteResponse)
 async def add_favorite(
         favorite_in: FavoriteCreate,
         current_user: User = Depends(get_current_user),
-        db: AsyncSession = Depends(get_db)
+        db: AsyncSession = Depends(get_db),
+        http_client: httpx.AsyncClient = Depends(get_http_client),
+        redis: Redis = Depends(get_redis)
 ):
     """
     Добавляет фильм в избранное текущего пользователя.
@@ -133,6 +173,8 @@ async def add_favorite(
         favorite_in (FavoriteCreate): ID фильма для добавления.
         current_user (User): Текущий пользователь из JWT токена.
         db (AsyncSession): Сессия базы данных.
+        http_client (httpx.AsyncClient): Общий HTTP клиент для запросов к Movie Service.
+        redis (Redis): Общее подключение к Redis (кэш данных фильмов).
 
     Returns:
         FavoriteResponse: Информация о добавленном избранном фильме.
@@ -140,29 +182,56 @@ async def add_favorite(
     Raises:
         HTTPException: 404 если фильм не найден, 400 если уже в избранном.
     """
-    service = UserService(db, http_client=resources["http_client"])
-    return await service.add_to_favorites(current_user.id, favorite_in.movie_id)
+    return await service.add_to_favorites(db, http_client, redis, current_user.id, favorite_in.movie_id)
 
 
 @app.get("/users/me/favorites", response_model=list[FavoriteResponse])
 async def get_favorites(
+        cursor: datetime | None = None,
+        cursor_id: int | None = None,
+        limit: int = Query(50, ge=1, le=100),
         current_user: User = Depends(get_current_user),
         db: AsyncSession = Depends(get_db)
 ):
     """
-    Получает список избранных фильмов текущего пользователя.
+    Получает страницу избранных фильмов текущего пользователя.
 
-    Требует аутентификации через JWT токен.
+    Требует аутентификации через JWT токен. Для следующей страницы
+    передайте в cursor и cursor_id значения added_at и id последнего
+    полученного фильма.
 
     Args:
+        cursor (datetime | None): added_at последней записи предыдущей страницы.
+        cursor_id (int | None): id последней записи предыдущей страницы.
+        limit (int): Количество записей на странице (от 1 до 100).
         current_user (User): Текущий пользователь из JWT токена.
         db (AsyncSession): Сессия базы данных.
 
     Returns:
         list[FavoriteResponse]: Список избранных фильмов.
+
+    Raises:
+        HTTPException: 422 если передана только одна часть курсора.
     """
-    service = UserService(db)
-    return await service.get_user_favorites(current_user.id)
+    if (cursor is None) != (cursor_id is None):
+        raise HTTPException(
+            status_code=422,
+            detail="cursor and cursor_id must be passed together"
+        )
+
+    favorites = await service.get_user_favorites(
+        db,
+        current_user.id,
+        cursor=(cursor, cursor_id) if cursor is not None else None,
+        limit=limit
+    )
+
+    # Возвращаем готовый JSON: FastAPI не валидирует ответ повторно поэлементно,
+    # а response_model остается для документации OpenAPI
+    return Response(
+        content=_FAVORITES_ADAPTER.dump_json(_FAVORITES_ADAPTER.validate_python(favorites)),
+        media_type="application/json"
+    )
 
 
 @app.delete("/users/me/favorites/{movie_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -184,8 +253,7 @@ async def remove_favorite(
     Raises:
         HTTPException: 404 если фильм не найден в избранном.
     """
-    service = UserService(db)
-    success = await service.remove_from_favorites(current_user.id, movie_id)
+    success = await service.remove_from_favorites(db, current_user.id, movie_id)
 
     if not success:
         raise HTTPException(
@@ -198,4 +266,5 @@ HTTPXClientInstrumentor().instrument()
 from .database import engine
 SQLAlchemyInstrumentor().instrument(engine=engine.sync_engine)
 AioPikaInstrumentor().instrument()
+RedisInstrumentor().instrument()
 FastAPIInstrumentor.instrument_app(app)
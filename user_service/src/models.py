@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import String, Boolean, DateTime, func, Integer, ForeignKey, UniqueConstraint
+from sqlalchemy import String, LargeBinary, Boolean, DateTime, func, Integer, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from .database import Base
 
@@ -13,8 +13,8 @@ class User(Base):
 
     Attributes:
         id (int): Уникальный идентификатор пользователя (первичный ключ).
-        email (str): Электронная почта пользователя (уникальное поле).
-        hashed_password (str): Хэшированный пароль пользователя.
+        email (str): Электронная почта пользователя (уникальна без учета регистра).
+        hashed_password (bytes): Хэшированный пароль пользователя (ASCII-строка Argon2 в bytea).
         is_active (bool): Флаг активности учетной записи.
         created_at (datetime): Дата и время создания записи о пользователе.
         favorites: Relationship to Favorite model.
@@ -22,8 +22,8 @@ class User(Base):
     __tablename__ = "users"
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    email: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
-    hashed_password: Mapped[str] = mapped_column(String, nullable=False)
+    email: Mapped[str] = mapped_column(String(255), nullable=False)
+    hashed_password: Mapped[bytes] = mapped_column(LargeBinary(128), nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
 
     # Автоматически устанавливает текущее время при создании записи
@@ -39,6 +39,12 @@ class User(Base):
         cascade="all, delete-orphan"
     )
 
+    # Функциональный уникальный индекс по lower(email): email уникален без учета
+    # регистра, и этот же индекс используется для поиска пользователя при входе
+    __table_args__ = (
+        Index("uq_users_email_lower", func.lower(email), unique=True),
+    )
+
 
 class Favorite(Base):
     """
@@ -72,7 +78,10 @@ class Favorite(Base):
     # Relationship к пользователю
     user: Mapped["User"] = relationship("User", back_populates="favorites")
 
-    # Уникальное ограничение: один фильм может быть добавлен пользователем только один раз
+    # Уникальное ограничение: один фильм может быть добавлен пользователем только один раз.
+    # Составной индекс (user_id, added_at DESC, id DESC) отдает избранное
+    # пользователя уже отсортированным в порядке курсора пагинации
     __table_args__ = (
         UniqueConstraint("user_id", "movie_id", name="uq_user_movie"),
+        Index("ix_favorites_user_added", "user_id", added_at.desc(), id.desc()),
     )
\ No newline at end of file
@@ -1,6 +1,35 @@
-from pydantic import BaseModel, EmailStr, ConfigDict
+import re
+from typing import Annotated
+
+from pydantic import AfterValidator, BaseModel, ConfigDict
 from datetime import datetime
 
+# Упрощенная проверка формата email: шаблон компилируется один раз при импорте.
+# Полная проверка по RFC (email-validator) для регистрации не нужна —
+# существование адреса все равно подтверждается письмом
+_EMAIL_RE = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+
+
+def _validate_email(value: str) -> str:
+    """
+    Проверяет формат email и приводит его к нижнему регистру.
+
+    Args:
+        value (str): Email, переданный клиентом.
+
+    Returns:
+        str: Email в нижнем регистре.
+
+    Raises:
+        ValueError: Если строка не похожа на email.
+    """
+    if not _EMAIL_RE.fullmatch(value):
+        raise ValueError("invalid email")
+    return value.lower()
+
+
+Email = Annotated[str, AfterValidator(_validate_email)]
+
 
 class UserBase(BaseModel):
     """
@@ -9,9 +38,10 @@ class UserBase(BaseModel):
     Содержит общие поля, которые используются в других схемах.
 
     Attributes:
-        email (EmailStr): Электронная почта пользователя с валидацией формата.
+        email (Email): Электронная почта пользователя с валидацией формата
+            (хранится в нижнем регистре).
     """
-    email: EmailStr
+    email: Email
 
 
 class UserCreate(UserBase):
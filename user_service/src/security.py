@@ -1,28 +1,100 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from passlib.context import CryptContext
-from jose import jwt
+from cachetools import TTLCache
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+import bcrypt
+import jwt
 
 from .config import settings
 
-# Настройка хэширования паролей с использованием алгоритма bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Хэширование паролей алгоритмом Argon2id (argon2-cffi, эталонная C-реализация)
+ph = PasswordHasher(time_cost=3, memory_cost=64 * 1024, parallelism=4, hash_len=32)
 
+# Пароли, сохраненные до перехода на Argon2, хэшированы bcrypt (passlib).
+# Такие хэши по-прежнему проверяются и заменяются на Argon2 при успешном входе
+_BCRYPT_PREFIX = b"$2"
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+# Хэш-заглушка для входа с несуществующим email: проверка пароля выполняется
+# всегда, поэтому по времени ответа нельзя узнать, зарегистрирован ли email.
+# Вычисляется один раз при импорте, а не на каждый такой вход
+_DUMMY_HASH = ph.hash("invalid").encode("ascii")
+
+# Пул потоков для хэширования: вычисления Argon2 занимают десятки миллисекунд
+# и отпускают GIL, поэтому выполняются вне цикла событий и параллельно по ядрам
+_HASH_POOL = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="password-hash")
+
+# Кэш выданных токенов: повторный вход с теми же данными в пределах 5 секунд
+# получает уже подписанный токен вместо повторного вычисления HMAC
+_TOKEN_CACHE_TTL = 5
+_TOKEN_CACHE: TTLCache = TTLCache(maxsize=10_000, ttl=_TOKEN_CACHE_TTL)
+
+
+def verify_password(plain_password: str, hashed_password: bytes) -> bool:
     """
     Проверяет соответствие введенного пароля хэшированному паролю.
 
     Args:
         plain_password (str): Введенный пользователем пароль в открытом виде.
-        hashed_password (str): Хэшированный пароль, хранящийся в базе данных.
+        hashed_password (bytes): Хэшированный пароль, хранящийся в базе данных.
 
     Returns:
         bool: True если пароль верный, False в противном случае.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    if hashed_password.startswith(_BCRYPT_PREFIX):
+        return _verify_legacy_bcrypt(plain_password, hashed_password)
 
+    try:
+        return ph.verify(hashed_password, plain_password)
+    except (VerificationError, InvalidHashError):
+        # Неверный пароль или хэш не в формате Argon2
+        return False
 
-def get_password_hash(password: str) -> str:
+
+def _verify_legacy_bcrypt(plain_password: str, hashed_password: bytes) -> bool:
+    """
+    Проверяет пароль по хэшу bcrypt, созданному до перехода на Argon2.
+
+    Args:
+        plain_password (str): Введенный пользователем пароль в открытом виде.
+        hashed_password (bytes): Хэш bcrypt из базы данных.
+
+    Returns:
+        bool: True если пароль верный, False в противном случае.
+    """
+    # passlib молча обрезал пароль до 72 байт (ограничение bcrypt),
+    # а bcrypt 5 на длинный пароль бросает ValueError — обрезаем так же
+    try:
+        return bcrypt.checkpw(plain_password.encode("utf-8")[:72], hashed_password)
+    except ValueError:
+        # Поврежденный хэш
+        return False
+
+
+def password_needs_rehash(hashed_password: bytes) -> bool:
+    """
+    Проверяет, нужно ли пересчитать хэш пароля после успешного входа.
+
+    Пересчет нужен для хэшей bcrypt, оставшихся до перехода на Argon2,
+    и для хэшей Argon2 с устаревшими параметрами.
+
+    Args:
+        hashed_password (bytes): Хэшированный пароль, хранящийся в базе данных.
+
+    Returns:
+        bool: True если хэш нужно заменить на новый.
+    """
+    if hashed_password.startswith(_BCRYPT_PREFIX):
+        return True
+    try:
+        return ph.check_needs_rehash(hashed_password)
+    except InvalidHashError:
+        return False
+
+
+def get_password_hash(password: str) -> bytes:
     """
     Генерирует безопасный хэш пароля для хранения в базе данных.
 
@@ -30,9 +102,49 @@ def get_password_hash(password: str) -> str:
         password (str): Пароль в открытом виде.
 
     Returns:
-        str: Хэшированный пароль.
+        bytes: Хэшированный пароль (ASCII-строка Argon2 в виде байтов,
+            хранится в колонке bytea без перекодирования UTF-8).
+    """
+    return ph.hash(password).encode("ascii")
+
+
+async def averify_password(plain_password: str, hashed_password: bytes | None) -> bool:
+    """
+    Асинхронная версия verify_password, выполняемая в пуле потоков.
+
+    Не блокирует цикл событий на время проверки пароля. Если хэш не передан
+    (пользователь не найден), пароль проверяется против хэша-заглушки,
+    чтобы время ответа не зависело от существования пользователя.
+
+    Args:
+        plain_password (str): Введенный пользователем пароль в открытом виде.
+        hashed_password (bytes | None): Хэшированный пароль, хранящийся в базе данных,
+            или None, если пользователь не найден.
+
+    Returns:
+        bool: True если пароль верный, False в противном случае.
+    """
+    loop = asyncio.get_running_loop()
+    if hashed_password is None:
+        await loop.run_in_executor(_HASH_POOL, verify_password, plain_password, _DUMMY_HASH)
+        return False
+    return await loop.run_in_executor(_HASH_POOL, verify_password, plain_password, hashed_password)
+
+
+async def aget_password_hash(password: str) -> bytes:
+    """
+    Асинхронная версия get_password_hash, выполняемая в пуле потоков.
+
+    Не блокирует цикл событий на время вычисления хэша.
+
+    Args:
+        password (str): Пароль в открытом виде.
+
+    Returns:
+        bytes: Хэшированный пароль.
     """
-    return pwd_context.hash(password)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_HASH_POOL, get_password_hash, password)
 
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
@@ -47,21 +159,30 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     Returns:
         str: Закодированный JWT токен.
     """
-    to_encode = data.copy()
-
     # Определяем время истечения токена
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
 
+    # Токены с теми же данными и временем истечения в пределах одного
+    # 5-секундного окна совпадают с точностью до exp, поэтому переиспользуем их
+    cache_key = (frozenset(data.items()), int(expire.timestamp()) // _TOKEN_CACHE_TTL)
+    cached_token = _TOKEN_CACHE.get(cache_key)
+    if cached_token is not None:
+        return cached_token
+
+    to_encode = data.copy()
+
     # Добавляем время истечения (exp) в токен
     to_encode.update({"exp": expire})
 
-    # Шифруем данные с использованием секретного ключа и алгоритма из настроек
+    # Подписываем данные секретным ключом и алгоритмом из настроек
+    # (PyJWT: HMAC считается через OpenSSL в cryptography)
     encoded_jwt = jwt.encode(
         to_encode,
         settings.SECRET_KEY,
         algorithm=settings.ALGORITHM
     )
+    _TOKEN_CACHE[cache_key] = encoded_jwt
     return encoded_jwt
\ No newline at end of file
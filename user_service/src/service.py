@@ -1,198 +1,390 @@
+import asyncio
+from datetime import datetime
+from typing import NamedTuple
+
+from cachetools import TTLCache
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
+from redis.asyncio import Redis
 import httpx
+import orjson
 
 from .models import User, Favorite
 from .schemas import UserCreate
-from .security import get_password_hash, verify_password
-from .config import settings
+from .security import aget_password_hash, averify_password, password_needs_rehash
 import structlog
 
 logger = structlog.get_logger()
 
+# Данные фильмов (название, постер) почти не меняются, а популярные фильмы
+# запрашиваются постоянно, поэтому держим их в памяти процесса 5 минут
+_MOVIE_CACHE: TTLCache[int, dict] = TTLCache(maxsize=10_000, ttl=300)
+
+# Второй уровень кэша — Redis, общий для всех воркеров и реплик: фильм,
+# который уже запросил один воркер, остальные получают без обращения к Movie Service
+MOVIE_REDIS_TTL = 300
+
+# Запросы к Movie Service, которые выполняются прямо сейчас, по ID фильма.
+# Конкурентные промахи по одному фильму ждут общую задачу (защита от cache stampede)
+_inflight: dict[int, asyncio.Task] = {}
+
+
+def _movie_cache_key(movie_id: int) -> str:
+    """
+    Формирует ключ Redis для данных фильма.
+
+    Args:
+        movie_id (int): ID фильма в TMDB.
+
+    Returns:
+        str: Ключ кэша.
+    """
+    return f"movie:{movie_id}"
+
+
+def _forget_inflight(movie_ids: list[int], task: asyncio.Task) -> None:
+    """
+    Убирает завершенную задачу из реестра выполняющихся запросов.
 
-class UserService:
+    Args:
+        movie_ids (list[int]): ID фильмов, которые запрашивала задача.
+        task (asyncio.Task): Завершенная задача.
     """
-    Сервис для управления пользователями.
+    for movie_id in movie_ids:
+        if _inflight.get(movie_id) is task:
+            del _inflight[movie_id]
 
-    Реализует бизнес-логику работы с пользователями: регистрацию, аутентификацию.
-    Работает с базой данных через асинхронную сессию SQLAlchemy.
+
+class AuthenticatedUser(NamedTuple):
+    """
+    Минимальные данные пользователя, прошедшего аутентификацию.
 
     Attributes:
-        db (AsyncSession): Сессия базы данных для выполнения запросов.
-        http_client (httpx.AsyncClient | None): HTTP клиент для межсервисных запросов.
-    """
-
-    def __init__(self, db: AsyncSession, http_client: httpx.AsyncClient | None = None):
-        self.db = db
-        self.http_client = http_client
-
-    async def create_user(self, user_in: UserCreate) -> User:
-        """
-        Регистрирует нового пользователя в системе.
-
-        Args:
-            user_in (UserCreate): Данные для регистрации (email и пароль).
-
-        Returns:
-            User: Созданный пользователь (ORM-объект).
-
-        Raises:
-            HTTPException: Если пользователь с таким email уже существует.
-        """
-        # Проверяем, занят ли email
-        query = select(User).where(User.email == user_in.email)
-        result = await self.db.execute(query)
-        if result.scalar_one_or_none():
-            raise HTTPException(
-                status_code=400,
-                detail="Email already registered"
-            )
-
-        # Создаем пользователя с хэшированным паролем
-        new_user = User(
+        id (int): Идентификатор пользователя.
+        email (str): Email пользователя.
+    """
+    id: int
+    email: str
+
+
+async def create_user(db: AsyncSession, user_in: UserCreate) -> User:
+    """
+    Регистрирует нового пользователя в системе.
+
+    Args:
+        db (AsyncSession): Сессия базы данных.
+        user_in (UserCreate): Данные для регистрации (email и пароль).
+
+    Returns:
+        User: Созданный пользователь (ORM-объект).
+
+    Raises:
+        HTTPException: Если пользователь с таким email уже существует.
+    """
+    # Проверка занятости email и вставка выполняются одним атомарным запросом:
+    # INSERT ... ON CONFLICT DO NOTHING RETURNING вернет строку,
+    # только если пользователя с таким email еще нет
+    query = (
+        insert(User)
+        .values(
             email=user_in.email,
-            hashed_password=get_password_hash(user_in.password),
+            hashed_password=await aget_password_hash(user_in.password),
             is_active=True
         )
+        .on_conflict_do_nothing(index_elements=[func.lower(User.email)])
+        .returning(User)
+    )
+    result = await db.execute(query)
+    new_user = result.scalar_one_or_none()
+    if new_user is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Email already registered"
+        )
+
+    await db.commit()
+
+    # Отправляем событие о регистрации (асинхронно, без ожидания подтверждения если нужно максимально быстро)
+    # В данном случае мы просто вызываем метод
+    from .events import publisher
+    await publisher.publish_user_created(new_user.id, new_user.email)
+
+    return new_user
+
 
-        # Сохраняем пользователя в базе данных
-        self.db.add(new_user)
-        await self.db.commit()
-        await self.db.refresh(new_user)
-
-        # Отправляем событие о регистрации (асинхронно, без ожидания подтверждения если нужно максимально быстро)
-        # В данном случае мы просто вызываем метод
-        from .events import publisher
-        await publisher.publish_user_created(new_user.id, new_user.email)
-
-        return new_user
-
-    async def authenticate_user(self, email: str, password: str) -> User | None:
-        """
-        Аутентифицирует пользователя по email и паролю.
-
-        Args:
-            email (str): Email пользователя для входа.
-            password (str): Пароль пользователя для входа.
-
-        Returns:
-            User | None: Объект пользователя при успешной аутентификации,
-            None в случае неудачи.
-        """
-        # Ищем пользователя по email
-        query = select(User).where(User.email == email)
-        result = await self.db.execute(query)
-        user = result.scalar_one_or_none()
-
-        # Проверяем, существует ли пользователь и совпадает ли пароль
-        if not user or not verify_password(password, user.hashed_password):
-            return None
-
-        return user
-
-    async def add_to_favorites(self, user_id: int, movie_id: int) -> Favorite:
-        """
-        Добавляет фильм в избранное пользователя.
-
-        Сначала проверяет существование фильма через запрос к Movie Service,
-        затем создает запись в БД с закешированными данными о фильме.
-
-        Args:
-            user_id (int): ID пользователя.
-            movie_id (int): ID фильма в TMDB.
-
-        Returns:
-            Favorite: Созданная запись об избранном фильме.
-
-        Raises:
-            HTTPException: 404 если фильм не найден, 400 если уже в избранном.
-        """
-        if not self.http_client:
-            raise HTTPException(
-                status_code=500,
-                detail="HTTP client not configured"
-            )
-
-        # Запрос к Movie Service для получения деталей фильма
-        try:
-            response = await self.http_client.get(
-                f"{settings.MOVIE_SERVICE_URL}/movies/{movie_id}"
-            )
-            if response.status_code == 404:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Movie with ID {movie_id} not found"
-                )
-            response.raise_for_status()
-        except httpx.HTTPError as e:
-            raise HTTPException(
-                status_code=502,
-                detail=f"Failed to communicate with Movie Service: {str(e)}"
-            )
-
-        movie_data = response.json()
-
-        # Создаем запись в избранном с закешированными данными
-        favorite = Favorite(
-            user_id=user_id,
-            movie_id=movie_id,
-            movie_title=movie_data.get("title", "Unknown"),
-            movie_poster_path=movie_data.get("poster_path")
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> AuthenticatedUser | None:
+    """
+    Аутентифицирует пользователя по email и паролю.
+
+    Args:
+        db (AsyncSession): Сессия базы данных.
+        email (str): Email пользователя для входа.
+        password (str): Пароль пользователя для входа.
+
+    Returns:
+        AuthenticatedUser | None: Данные пользователя при успешной
+        аутентификации, None в случае неудачи.
+    """
+    # Выбираем только нужные колонки: строка Core не проходит через
+    # гидратацию ORM-объекта и identity map
+    query = select(User.id, User.email, User.hashed_password).where(
+        func.lower(User.email) == email.lower()
+    )
+    result = await db.execute(query)
+    row = result.first()
+
+    # Пароль проверяется и для несуществующего пользователя (против хэша-заглушки),
+    # чтобы время ответа не выдавало, зарегистрирован ли email
+    password_ok = await averify_password(password, row.hashed_password if row else None)
+    if row is None or not password_ok:
+        return None
+
+    # Хэши bcrypt (до перехода на Argon2) и хэши с устаревшими параметрами
+    # заменяем при первом успешном входе, пока известен пароль в открытом виде
+    if password_needs_rehash(row.hashed_password):
+        await db.execute(
+            update(User)
+            .where(User.id == row.id)
+            .values(hashed_password=await aget_password_hash(password))
         )
+        await db.commit()
 
-        try:
-            self.db.add(favorite)
-            await self.db.commit()
-            await self.db.refresh(favorite)
-        except IntegrityError:
-            await self.db.rollback()
-            raise HTTPException(
-                status_code=400,
-                detail="Movie already in favorites"
-            )
-
-        return favorite
-
-    async def get_user_favorites(self, user_id: int) -> list[Favorite]:
-        """
-        Получает список избранных фильмов пользователя.
-
-        Args:
-            user_id (int): ID пользователя.
-
-        Returns:
-            list[Favorite]: Список избранных фильмов.
-        """
-        query = select(Favorite).where(Favorite.user_id == user_id).order_by(Favorite.added_at.desc())
-        result = await self.db.execute(query)
-        favorites = result.scalars().all()
-        return list(favorites)
-
-    async def remove_from_favorites(self, user_id: int, movie_id: int) -> bool:
-        """
-        Удаляет фильм из избранного пользователя.
-
-        Args:
-            user_id (int): ID пользователя.
-            movie_id (int): ID фильма в TMDB.
-
-        Returns:
-            bool: True если удаление успешно, False если запись не найдена.
-        """
-        query = select(Favorite).where(
-            Favorite.user_id == user_id,
-            Favorite.movie_id == movie_id
+    return AuthenticatedUser(id=row.id, email=row.email)
+
+
+async def add_to_favorites(
+        db: AsyncSession,
+        http_client: httpx.AsyncClient | None,
+        redis: Redis,
+        user_id: int,
+        movie_id: int
+) -> Favorite:
+    """
+    Добавляет фильм в избранное пользователя.
+
+    Сначала проверяет существование фильма через запрос к Movie Service,
+    затем создает запись в БД с закешированными данными о фильме.
+
+    Args:
+        db (AsyncSession): Сессия базы данных.
+        http_client (httpx.AsyncClient | None): HTTP клиент с base_url Movie Service.
+        redis (Redis): Клиент Redis с общим кэшем данных фильмов.
+        user_id (int): ID пользователя.
+        movie_id (int): ID фильма в TMDB.
+
+    Returns:
+        Favorite: Созданная запись об избранном фильме.
+
+    Raises:
+        HTTPException: 404 если фильм не найден, 400 если уже в избранном.
+    """
+    # Запрос к Movie Service для получения деталей фильма
+    movies = await fetch_movies(http_client, redis, [movie_id])
+    movie_data = movies.get(movie_id)
+    if movie_data is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Movie with ID {movie_id} not found"
+        )
+
+    # Создаем запись в избранном с закешированными данными
+    favorite = Favorite(
+        user_id=user_id,
+        movie_id=movie_id,
+        movie_title=movie_data.get("title", "Unknown"),
+        movie_poster_path=movie_data.get("poster_path")
+    )
+
+    try:
+        db.add(favorite)
+        await db.commit()
+        await db.refresh(favorite)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="Movie already in favorites"
+        )
+
+    return favorite
+
+
+async def fetch_movies(
+        http_client: httpx.AsyncClient | None,
+        redis: Redis,
+        movie_ids: list[int]
+) -> dict[int, dict]:
+    """
+    Получает данные о фильмах из кэша процесса, затем из Redis,
+    а недостающие — из Movie Service одним пакетным запросом.
+
+    Args:
+        http_client (httpx.AsyncClient | None): HTTP клиент с base_url Movie Service.
+        redis (Redis): Клиент Redis с общим кэшем данных фильмов.
+        movie_ids (list[int]): ID фильмов в TMDB.
+
+    Returns:
+        dict[int, dict]: Данные найденных фильмов по их ID.
+        Несуществующие фильмы в словарь не попадают.
+
+    Raises:
+        HTTPException: 500 если HTTP клиент не настроен,
+            502 если Movie Service недоступен.
+    """
+    if not http_client:
+        raise HTTPException(
+            status_code=500,
+            detail="HTTP client not configured"
         )
-        result = await self.db.execute(query)
-        favorite = result.scalar_one_or_none()
 
-        if not favorite:
-            return False
+    movies: dict[int, dict] = {}
+    pending: dict[int, asyncio.Task] = {}
+    missing: list[int] = []
+    for movie_id in dict.fromkeys(movie_ids):
+        if (movie := _MOVIE_CACHE.get(movie_id)) is not None:
+            movies[movie_id] = movie
+        elif (task := _inflight.get(movie_id)) is not None:
+            pending[movie_id] = task
+        else:
+            missing.append(movie_id)
+
+    # Фильмы, которых нет ни в кэше, ни в уже идущих запросах,
+    # запрашиваем одной общей задачей
+    if missing:
+        task = asyncio.create_task(_request_movies(http_client, redis, missing))
+        for movie_id in missing:
+            _inflight[movie_id] = task
+            pending[movie_id] = task
+        task.add_done_callback(lambda t: _forget_inflight(missing, t))
+
+    # shield: отмена одного клиента не должна отменять общий запрос
+    tasks = list(set(pending.values()))
+    results = dict(zip(tasks, await asyncio.gather(*map(asyncio.shield, tasks))))
+    for movie_id, task in pending.items():
+        if (movie := results[task].get(movie_id)) is not None:
+            movies[movie_id] = movie
+
+    return movies
+
+
+async def _request_movies(
+        http_client: httpx.AsyncClient,
+        redis: Redis,
+        movie_ids: list[int]
+) -> dict[int, dict]:
+    """
+    Читает фильмы из Redis, недостающие запрашивает в Movie Service
+    и сохраняет результат в Redis и в кэш процесса.
 
-        await self.db.delete(favorite)
-        await self.db.commit()
+    Args:
+        http_client (httpx.AsyncClient): HTTP клиент с base_url Movie Service.
+        redis (Redis): Клиент Redis с общим кэшем данных фильмов.
+        movie_ids (list[int]): ID фильмов, которых нет в кэше процесса.
+
+    Returns:
+        dict[int, dict]: Данные найденных фильмов по их ID.
+
+    Raises:
+        HTTPException: 502 если Movie Service недоступен.
+    """
+    # Все фильмы читаем из Redis одним MGET
+    cached = await redis.mget([_movie_cache_key(movie_id) for movie_id in movie_ids])
+    movies = {
+        movie_id: orjson.loads(raw)
+        for movie_id, raw in zip(movie_ids, cached)
+        if raw is not None
+    }
+    _MOVIE_CACHE.update(movies)
+
+    missing = [movie_id for movie_id in movie_ids if movie_id not in movies]
+    if not missing:
+        return movies
+
+    try:
+        response = await http_client.get(
+            "/movies",
+            params={"ids": missing}
+        )
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        raise HTTPException(
+            status_code=502,
+            detail=f"Failed to communicate with Movie Service: {str(e)}"
+        )
+
+    fetched = {movie["id"]: movie for movie in orjson.loads(response.content)}
+    if fetched:
+        # Сохраняем все полученные фильмы в Redis за один round-trip
+        async with redis.pipeline(transaction=False) as pipe:
+            for movie_id, movie in fetched.items():
+                pipe.setex(_movie_cache_key(movie_id), MOVIE_REDIS_TTL, orjson.dumps(movie))
+            await pipe.execute()
+        _MOVIE_CACHE.update(fetched)
+
+    movies.update(fetched)
+    return movies
+
+
+async def get_user_favorites(
+        db: AsyncSession,
+        user_id: int,
+        cursor: tuple[datetime, int] | None = None,
+        limit: int = 50
+) -> list[Favorite]:
+    """
+    Получает страницу избранных фильмов пользователя (от новых к старым).
+
+    Использует keyset-пагинацию: вместо OFFSET следующая страница
+    начинается после (added_at, id) последней записи предыдущей, поэтому
+    чтение идет по индексу ix_favorites_user_added и стоит O(limit).
+    id в курсоре нужен, потому что added_at не уникален: записи с одинаковым
+    временем на границе страниц иначе были бы пропущены.
+
+    Args:
+        db (AsyncSession): Сессия базы данных.
+        user_id (int): ID пользователя.
+        cursor (tuple[datetime, int] | None): added_at и id последней записи
+            предыдущей страницы. None — первая страница.
+        limit (int): Максимальное количество записей на странице.
+
+    Returns:
+        list[Favorite]: Список избранных фильмов.
+    """
+    query = select(Favorite).where(Favorite.user_id == user_id)
+    if cursor is not None:
+        query = query.where(tuple_(Favorite.added_at, Favorite.id) < cursor)
+    query = query.order_by(Favorite.added_at.desc(), Favorite.id.desc()).limit(limit)
+    result = await db.execute(query)
+    favorites = result.scalars().all()
+    return list(favorites)
+
+
+async def remove_from_favorites(db: AsyncSession, user_id: int, movie_id: int) -> bool:
+    """
+    Удаляет фильм из избранного пользователя.
+
+    Args:
+        db (AsyncSession): Сессия базы данных.
+        user_id (int): ID пользователя.
+        movie_id (int): ID фильма в TMDB.
+
+    Returns:
+        bool: True если удаление успешно, False если запись не найдена.
+    """
+    # Один DELETE ... RETURNING вместо загрузки записи и отдельного удаления
+    query = (
+        delete(Favorite)
+        .where(
+            Favorite.user_id == user_id,
+            Favorite.movie_id == movie_id
+        )
+        .returning(Favorite.id)
+    )
+    result = await db.execute(query)
+    deleted_id = result.scalar_one_or_none()
+    await db.commit()
 
-        return True
\ No newline at end of file
+    return deleted_id is not None
\ No newline at end of file